@@ -2,9 +2,14 @@
 import os
 import sys
 import json
+import orjson
 import requests
 import sqlite3
 from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from dotenv import load_dotenv
 
@@ -16,7 +21,7 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 # ===============================
 # Загружаем переменные окружения из .env
@@ -26,15 +31,17 @@ load_dotenv()
 # ===============================
 # Конфигурация hh.ru (OAuth2) через ENV
 # ===============================
-EXCLUDED_EMPLOYEE_IDS = [
+EXCLUDED_EMPLOYEE_IDS = frozenset({
     3177, 999442, 9330017, 10871726, 3443127, 2657797, 6153907, 2156474, 1545374,
     2553761, 1498795, 1999994, 5481550, 9579070, 3112459, 10004751, 11842692,
-    3089914, 10623824, 9860737, 4263964, 9623282, 2899434, 3094193, 5830512,
-    57073, 11056965, 4174021, 10753971, 1729313, 2022372, 5388489, 1740, 10753971,
-    5805688, 611692, 4263964, 4856020, 3390849, 5302705, 5547644, 10753971,
-    11571595, 11124587, 10321769, 11695543, 4671816, 2732037, 4333013, 11807162,
-    2800609, 11807162, 5193393, 1141344, 9330017, 5687059, 3315744
-]
+    3089914, 10623824, 9860737, 4263964, 9623282, 2899434, 3094193, 5830512, 57073,
+    11056965, 4174021, 10753971, 1729313, 2022372, 5388489, 1740, 5805688, 611692,
+    4856020, 3390849, 5302705, 5547644, 11571595, 11124587, 10321769, 11695543,
+    4671816, 2732037, 4333013, 11807162, 2800609, 5193393, 1141344, 5687059,
+    3315744
+})
+# employer_id в БД хранится строкой — держим готовое множество строк для SQL
+EXCLUDED_EMPLOYEE_ID_STRS = frozenset(str(eid) for eid in EXCLUDED_EMPLOYEE_IDS)
 
 HH_CLIENT_ID = os.environ.get("HH_CLIENT_ID", "")
 HH_CLIENT_SECRET = os.environ.get("HH_CLIENT_SECRET", "")
@@ -42,6 +49,10 @@ HH_REDIRECT_URI = os.environ.get("HH_REDIRECT_URI", "https://example.com/")
 HH_AUTHORIZATION_URL = "https://hh.ru/oauth/authorize"
 HH_TOKEN_URL = "https://api.hh.ru/token"  # Обмен кода на токен
 STATE = "random_state_string"  # Можно использовать случайную строку для защиты
+HH_TOKEN_FILE = "hh_token.json"  # Файл с токенами hh.ru
+
+# Содержимое HH_TOKEN_FILE в памяти, чтобы не перечитывать файл на каждый вызов
+_TOKEN_CACHE = None
 
 # ===============================
 # Настройки парсинга вакансий
@@ -51,25 +62,66 @@ HH_API_URL = "https://api.hh.ru/vacancies"
 PER_PAGE = 100  # Количество вакансий за запрос
 KEYWORD = "AmoCRM"  # Ключевое слово для поиска
 
+FETCH_WORKERS = 8  # Максимум одновременных запросов к hh.ru при загрузке страниц
+
+# HTTP-сессия с пулом keep-alive соединений к hh.ru (создаётся в main)
+SESSION = None
+
+# Общее соединение с БД на весь процесс (открывается в get_conn)
+_DB_CONN = None
+
 # ===============================
 # Настройки Google Sheets
 # ===============================
 SHEET_ID = os.environ.get("GOOGLE_SHEET_ID", "")
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
+SHEET_BATCH_ROWS = 5000  # Строк в одном диапазоне batchUpdate
+
+
+# ===============================
+# HTTP-сессия
+# ===============================
+def create_session():
+    """
+    Создаёт requests.Session с пулом соединений и повторами
+    на 429/5xx, чтобы не открывать TLS-соединение на каждый запрос.
+    """
+    session = requests.Session()
+    retries = Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False
+    )
+    # Больше FETCH_WORKERS запросов одновременно не бывает — столько и держим соединений
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=FETCH_WORKERS, max_retries=retries)
+    session.mount("https://", adapter)
+    return session
 
 
 # ===============================
 # Функция авторизации hh.ru
 # ===============================
+def load_hh_token_data():
+    """
+    Возвращает сохранённые токены hh.ru (или None, если файла нет).
+    Файл читается один раз, дальше данные берутся из _TOKEN_CACHE.
+    """
+    global _TOKEN_CACHE
+    if _TOKEN_CACHE is None and os.path.exists(HH_TOKEN_FILE):
+        with open(HH_TOKEN_FILE, "r") as f:
+            _TOKEN_CACHE = json.load(f)
+    return _TOKEN_CACHE
+
+
 def get_hh_token():
     """
     Получаем/обновляем токен через OAuth2.
     """
-    token_file = "hh_token.json"
-    # Если файл с токеном уже есть – читаем
-    if os.path.exists(token_file):
-        with open(token_file, "r") as f:
-            token_data = json.load(f)
+    global _TOKEN_CACHE
+    # Если токен уже сохранён – берём его
+    token_data = load_hh_token_data()
+    if token_data is not None:
         return token_data.get("access_token")
 
     # Формирование URL для авторизации
@@ -93,15 +145,19 @@ def get_hh_token():
         "code": code,
         "redirect_uri": HH_REDIRECT_URI,
     }
+    # Authorization: None убирает из запроса bearer-токен, выставленный
+    # в сессии для API: OAuth-эндпоинту он не нужен (и может быть протухшим)
     headers = {
-        "Content-Type": "application/x-www-form-urlencoded"
+        "Content-Type": "application/x-www-form-urlencoded",
+        "Authorization": None
     }
-    response = requests.post(HH_TOKEN_URL, data=data, headers=headers)
+    response = SESSION.post(HH_TOKEN_URL, data=data, headers=headers)
     response.raise_for_status()
-    token_data = response.json()
-    with open(token_file, "w") as f:
-        json.dump(token_data, f)
-    print("Токен успешно получен и сохранён в", token_file)
+    token_data = orjson.loads(response.content)
+    with open(HH_TOKEN_FILE, "wb") as f:
+        f.write(orjson.dumps(token_data))
+    _TOKEN_CACHE = token_data
+    print("Токен успешно получен и сохранён в", HH_TOKEN_FILE)
     return token_data.get("access_token")
 
 def refresh_hh_token(refresh_token):
@@ -113,6 +169,7 @@ def refresh_hh_token(refresh_token):
     :param client_secret: Client Secret приложения HH.ru
     :return: Новый access_token или None при ошибке
     """
+    global _TOKEN_CACHE
     token_url = "https://hh.ru/oauth/token"  # Официальный эндпоинт HH.ru
     
     data = {
@@ -122,20 +179,24 @@ def refresh_hh_token(refresh_token):
         "client_secret": HH_CLIENT_SECRET
     }
     
+    # Протухший bearer-токен сессии на OAuth-эндпоинт не отправляем
     headers = {
-        "Content-Type": "application/x-www-form-urlencoded"
+        "Content-Type": "application/x-www-form-urlencoded",
+        "Authorization": None
     }
     
     try:
-        response = requests.post(token_url, data=data, headers=headers)
+        response = SESSION.post(token_url, data=data, headers=headers)
         response.raise_for_status()
         
-        token_data = response.json()
+        token_data = orjson.loads(response.content)
         
         # Сохраняем новые токены (включая новый refresh_token)
-        with open("hh_token.json", "w") as f:
-            json.dump(token_data, f)
-            
+        with open(HH_TOKEN_FILE, "wb") as f:
+            f.write(orjson.dumps(token_data))
+        _TOKEN_CACHE = token_data
+
+        SESSION.headers["Authorization"] = f"Bearer {token_data['access_token']}"
         return token_data["access_token"]
         
     except requests.exceptions.RequestException as e:
@@ -145,127 +206,207 @@ def refresh_hh_token(refresh_token):
 # ===============================
 # Работа с базой данных
 # ===============================
-def init_db():
+def connect_db():
     """
-    Создаем таблицу, если её нет.
+    Открывает соединение с БД и настраивает его под пакетную запись:
+    WAL-журнал, ослабленный fsync, кэш страниц 64 МБ и mmap 256 МБ.
+    Соединение в режиме autocommit: транзакции открываются явно (BEGIN IMMEDIATE).
     """
-    conn = sqlite3.connect(DATABASE_FILE)
+    conn = sqlite3.connect(DATABASE_FILE, check_same_thread=False, isolation_level=None)
     cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS hh_vacancies (
-            id TEXT PRIMARY KEY,
-            vacancy_name TEXT,
-            url TEXT,
-            employer_id TEXT,
-            employer_name TEXT,
-            city TEXT,
-            contact_name TEXT,
-            phones TEXT,
-            email TEXT,
-            prof_roles TEXT,
-            industry TEXT,
-            published_at TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    return conn
 
 
-def save_to_db(vacancies):
+@contextmanager
+def get_conn():
     """
-    Сохранение массива вакансий в базу SQLite.
+    Отдаёт общее соединение с БД, открывая его при первом обращении.
+    Если внутри блока возникла ошибка, незавершённая транзакция откатывается.
+    Закрывается соединение один раз — через close_db() в main().
     """
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+    global _DB_CONN
+    if _DB_CONN is None:
+        _DB_CONN = connect_db()
+    try:
+        yield _DB_CONN
+    except BaseException:
+        if _DB_CONN.in_transaction:
+            _DB_CONN.rollback()
+        raise
 
-    for vac in vacancies:
-        vac_id = vac.get("id", "")
-        vacancy_name = vac.get("name", "")
-        url = vac.get("alternate_url", "")
-
-        # Инфа о компании
-        employer = vac.get("employer", {})
-        employer_id = employer.get("id", "")
-        if employer_id and employer_id.isdigit():
-            # Убедимся, что employer_id - число, чтобы сравнивать корректно
-            if int(employer_id) in EXCLUDED_EMPLOYEE_IDS:
-                continue
-        employer_name = employer.get("name", "Не указано")
-        industries = employer.get("industries", [])
-        industry = industries[0].get("name", "") if len(industries) > 0 else ""
-
-        # Город
-        address = vac.get("address")
-        if address and "city" in address and address["city"]:
-            city = address["city"]
-        else:
-            area = vac.get("area", {})
-            city = area.get("name", "Не указано")
-
-        # Контакты
-        contacts = vac.get("contacts")
-        if contacts:
-            contact_name = contacts.get("name", "")
-            email = contacts.get("email", "")
-            phones_arr = contacts.get("phones", [])
-        else:
-            contact_name = ""
-            email = ""
-            phones_arr = []
-
-        # Собираем телефоны
-        phone_strings = []
-        has_contacts = False
-
-        for phone_obj in phones_arr:
-            country = phone_obj.get("country", "")
-            city_code = phone_obj.get("city", "")
-            number = phone_obj.get("number", "")
-            comment = phone_obj.get("comment", "")
-            if number:
-                has_contacts = True
-            phone_full = f"+{country} ({city_code}) {number}"
-            if comment:
-                phone_full += f" [{comment}]"
-            phone_strings.append(phone_full)
-
-        # Если нет email и нет ни одного телефона — пропускаем
-        if not email and not has_contacts:
-            continue
-
-        phones = "\n".join(phone_strings)
-
-        # Профессиональные роли
-        prof_roles_arr = vac.get("professional_roles", [])
-        prof_roles_names = [role.get("name", "") for role in prof_roles_arr]
-        prof_roles = ", ".join(prof_roles_names)
-
-        published_at = vac.get("published_at", "")
-
-        # Запись в базу (INSERT OR IGNORE, чтобы не дублировать)
+
+def close_db():
+    """
+    Закрывает общее соединение с БД, если оно было открыто.
+    """
+    global _DB_CONN
+    if _DB_CONN is not None:
+        _DB_CONN.close()
+        _DB_CONN = None
+
+
+def init_db():
+    """
+    Создаем таблицу, если её нет.
+    """
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
         cursor.execute("""
-            INSERT OR IGNORE INTO hh_vacancies (
-                id, vacancy_name, url,
-                employer_id, employer_name, city,
-                contact_name, phones, email,
-                prof_roles, industry, published_at
+            CREATE TABLE IF NOT EXISTS hh_vacancies (
+                id TEXT PRIMARY KEY,
+                vacancy_name TEXT,
+                url TEXT,
+                employer_id TEXT,
+                employer_name TEXT,
+                city TEXT,
+                contact_name TEXT,
+                phones TEXT,
+                email TEXT,
+                prof_roles TEXT,
+                industry TEXT,
+                published_at TEXT
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            vac_id, vacancy_name, url,
-            employer_id, employer_name, city,
-            contact_name, phones, email,
-            prof_roles, industry, published_at
-        ))
+        """)
+        # Индекс под фильтр NOT IN по работодателям при экспорте
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_emp ON hh_vacancies(employer_id)")
+        # Индекс под ORDER BY published_at DESC при экспорте
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_pub ON hh_vacancies(published_at DESC)")
+        cursor.execute("COMMIT")
+
+
+# Запрос вставки (INSERT OR IGNORE, чтобы не дублировать).
+# Текст один на весь прогон, поэтому sqlite3 берёт скомпилированный
+# statement из кэша, а не разбирает SQL заново на каждой странице.
+INSERT_SQL = """
+    INSERT OR IGNORE INTO hh_vacancies (
+        id, vacancy_name, url,
+        employer_id, employer_name, city,
+        contact_name, phones, email,
+        prof_roles, industry, published_at
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def format_phone(phone_obj):
+    """
+    Форматирует телефон из hh.ru: "+7 (495) 1234567 [комментарий]".
+    """
+    phone_full = "+%s (%s) %s" % (
+        phone_obj.get("country", ""), phone_obj.get("city", ""), phone_obj.get("number", "")
+    )
+    comment = phone_obj.get("comment")
+    if comment:
+        return "%s [%s]" % (phone_full, comment)
+    return phone_full
+
+
+# Общий пустой словарь для отсутствующих вложенных объектов вакансии,
+# чтобы не создавать новый {} на каждой строке. Не изменять!
+EMPTY = {}
+
+
+def vacancy_to_row(vac):
+    """
+    Преобразует вакансию hh.ru в кортеж для INSERT_SQL.
+    Возвращает None, если работодатель в списке исключённых
+    или у вакансии нет ни email, ни телефона.
+    """
+    g = vac.get
+
+    # Исключённых работодателей отсекаем здесь, а не в запросе к hh.ru
+    employer = g("employer") or EMPTY
+    employer_id = employer.get("id", "")
+    if employer_id in EXCLUDED_EMPLOYEE_ID_STRS:
+        return None
+
+    # Контакты. Если нет email и нет ни одного телефона — пропускаем
+    # сразу, ещё до разбора остальных полей
+    contacts = g("contacts")
+    if contacts:
+        contact_name = contacts.get("name", "")
+        email = contacts.get("email", "")
+        phones_arr = contacts.get("phones") or ()
+    else:
+        contact_name = ""
+        email = ""
+        phones_arr = ()
+
+    has_any_phone = any(phone_obj.get("number") for phone_obj in phones_arr)
+    if not email and not has_any_phone:
+        return None
+
+    vac_id = g("id", "")
+    vacancy_name = g("name", "")
+    url = g("alternate_url", "")
+
+    # Инфа о компании
+    employer_name = employer.get("name", "Не указано")
+    industries = employer.get("industries")
+    industry = industries[0].get("name", "") if industries else ""
+
+    # Город
+    address = g("address")
+    city = address.get("city") if address else None
+    if not city:
+        city = (g("area") or EMPTY).get("name", "Не указано")
+
+    # Собираем телефоны
+    phones = "\n".join(format_phone(phone_obj) for phone_obj in phones_arr)
+
+    # Профессиональные роли
+    prof_roles = ", ".join([role.get("name", "") for role in g("professional_roles") or ()])
+
+    published_at = g("published_at", "")
+
+    return (
+        vac_id, vacancy_name, url,
+        employer_id, employer_name, city,
+        contact_name, phones, email,
+        prof_roles, industry, published_at
+    )
 
-    conn.commit()
-    conn.close()
+
+def save_to_db(vacancies):
+    """
+    Сохранение массива вакансий в базу SQLite одной пачкой (executemany).
+    Строки передаются генератором: sqlite3 связывает и вставляет их по одной,
+    не собирая весь список кортежей в памяти.
+    """
+    rows = (row for row in map(vacancy_to_row, vacancies) if row is not None)
+
+    # Запись в базу одной транзакцией
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.executemany(INSERT_SQL, rows)
+        cursor.execute("COMMIT")
+
+
+# ===============================
+# Загрузка страницы выдачи hh.ru
+# ===============================
+def fetch_page(query, page):
+    """
+    Загружает одну страницу выдачи hh.ru и возвращает распарсенный JSON.
+    query — заранее закодированная строка параметров (urlencode), к ней
+    дописывается только номер страницы.
+    """
+    response = SESSION.get(HH_API_URL, params=f"{query}&page={page}")
+    response.raise_for_status()
+    # orjson разбирает крупные ответы hh.ru заметно быстрее stdlib json
+    return orjson.loads(response.content)
 
 
 # ===============================
 # Парсинг всех вакансий (по 100 шт. на странице)
 # ===============================
-def parse_all_vacancies(access_token):
+def parse_all_vacancies():
     """
     Последовательно проходим все страницы (до 200) и сохраняем вакансии.
     """
@@ -273,18 +414,14 @@ def parse_all_vacancies(access_token):
     per_page = 100
     total_saved = 0
 
+    params = {
+        "text": KEYWORD,
+        "per_page": per_page
+    }
+    query = urlencode(params)
+
     while True:
-        params = {
-            "text": KEYWORD,
-            "per_page": per_page,
-            "page": page
-        }
-        headers = {
-            "Authorization": f"Bearer {access_token}"
-        }
-        response = requests.get(HH_API_URL, params=params, headers=headers)
-        response.raise_for_status()
-        data = response.json()
+        data = fetch_page(query, page)
 
         vacancies = data.get("items", [])
         if not vacancies:
@@ -310,101 +447,129 @@ def parse_all_vacancies(access_token):
 # ===============================
 # Парсинг по заданному диапазону дат
 # ===============================
-def parse_by_date_range(access_token, date_from, date_to):
+def fetch_date_ranges(slices):
     """
-    Собирает все вакансии по ключевому слову за указанный диапазон дат.
+    Загружает вакансии по списку отрезков дат [(date_from, date_to), ...]
+    и отдаёт по одному списку вакансий на отрезок, в порядке отрезков
+    (без записи в БД).
+    Все запросы идут через один общий пул из FETCH_WORKERS потоков, так что
+    одновременно к hh.ru уходит не больше FETCH_WORKERS запросов. Сначала
+    запрашиваются первые страницы всех отрезков (из них узнаём число страниц),
+    затем в тот же пул ставятся остальные страницы.
     """
-    page = 0
     per_page = 100
-    total_saved = 0
-    print(f"Начинаем сбор за период {date_from}..{date_to}")
-
-    while True:
-        params = {
-            "text": KEYWORD,
-            "per_page": per_page,
-            "page": page,
-            "date_from": date_from,
-            "date_to": date_to,
-            "excluded_employer_id": EXCLUDED_EMPLOYEE_IDS
-        }
-        headers = {
-            "Authorization": f"Bearer {access_token}"
-        }
-
-        response = requests.get(HH_API_URL, params=params, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-
-        vacancies = data.get("items", [])
-        if not vacancies:
-            print(f"Нет больше вакансий в интервале {date_from} .. {date_to}. Останавливаемся.")
-            break
 
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        queries = []
+        for date_from, date_to in slices:
+            print(f"Начинаем сбор за период {date_from}..{date_to}")
+            params = {
+                "text": KEYWORD,
+                "per_page": per_page,
+                "date_from": date_from,
+                "date_to": date_to
+            }
+            # Кодируем параметры один раз на весь диапазон, а не на каждую страницу.
+            # excluded_employer_id в запрос не передаём: 52 id раздувают URL,
+            # исключённые работодатели отсекаются в vacancy_to_row
+            queries.append(urlencode(params))
+
+        # При первой же ошибке (например, 403 из-за протухшего токена) снимаем
+        # с очереди все ещё не начатые запросы, чтобы не долбить hh.ru заведомо
+        # бесполезными страницами, и сразу пробрасываем ошибку наверх
+        try:
+            first_pages = [executor.submit(fetch_page, query, 0) for query in queries]
+
+            pending = []
+            for (date_from, date_to), query, first_page in zip(slices, queries, first_pages):
+                data = first_page.result()
+                vacancies = data.get("items", [])
+                total_pages = data.get("pages", 1) if vacancies else 1
+                if total_pages > 200:
+                    print(f"Достигнут лимит 200 страниц (20 000 вакансий) для диапазона {date_from}..{date_to}.")
+                    total_pages = 200
+                futures = [executor.submit(fetch_page, query, page) for page in range(1, total_pages)]
+                pending.append((vacancies, total_pages, futures))
+
+            for (date_from, date_to), (vacancies, total_pages, futures) in zip(slices, pending):
+                for future in futures:
+                    vacancies.extend(future.result().get("items", []))
+                if vacancies:
+                    print(f"Диапазон {date_from}..{date_to}: загружено {total_pages} стр., {len(vacancies)} вакансий.")
+                else:
+                    print(f"Нет вакансий в интервале {date_from} .. {date_to}.")
+                yield vacancies
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+def parse_by_date_range(date_from, date_to):
+    """
+    Собирает все вакансии по ключевому слову за указанный диапазон дат
+    и сохраняет их в БД.
+    """
+    for vacancies in fetch_date_ranges([(date_from, date_to)]):
         save_to_db(vacancies)
-        total_saved += len(vacancies)
-        print(
-            f"Диапазон {date_from}..{date_to}, страница {page}. Получено {len(vacancies)} вакансий (сумма {total_saved}).")
-
-        page += 1
-        if page >= data.get("pages", 1):
-            print(f"Достигли последней страницы (диапазон {date_from}..{date_to}), завершаем цикл.")
-            break
-
-        if page >= 200:
-            print("Достигнут лимит 200 страниц (20 000 вакансий) для данного диапазона.")
-            break
-
-    print(f"Итого сохранено {total_saved} вакансий за период {date_from}..{date_to}.")
+        print(f"Итого сохранено {len(vacancies)} вакансий за период {date_from}..{date_to}.")
 
 
 # ===============================
 # Разбивка периода на равные части
 # ===============================
-def parse_with_parts(access_token, date_from, date_to, parts):
+def split_date_range(date_from, date_to, parts):
     """
-    Разбивает [date_from; date_to] на 'parts' равных отрезков (по дням)
-    и вызывает parse_by_date_range для каждого отрезка.
+    Разбивает [date_from; date_to] (формат YYYY-MM-DD) на 'parts' равных
+    отрезков по дням и возвращает список пар (начало, конец) в ISO
+    с точностью до секунд. При некорректных аргументах возвращает [].
     """
-    fmt_date = "%Y-%m-%d"
-    dt_start = datetime.strptime(date_from, fmt_date)
-    dt_end = datetime.strptime(date_to, fmt_date)
+    dt_start = date.fromisoformat(date_from)
+    dt_end = date.fromisoformat(date_to)
 
     if dt_end < dt_start:
         print(f"Ошибка: date_end < date_start ({date_to} < {date_from})")
-        return
+        return []
     if parts <= 0:
         print(f"Ошибка: parts={parts}, должно быть > 0.")
-        return
+        return []
 
     total_days = (dt_end - dt_start).days + 1
     days_per_part = total_days // parts
     remainder = total_days % parts
 
+    slices = []
     current_start = dt_start
     for i in range(parts):
         extra = 1 if i < remainder else 0
-        current_end = current_start + timedelta(days=days_per_part + extra - 1)
-        if current_end > dt_end:
-            current_end = dt_end
-
-        # Преобразуем в ISO с точностью до секунд
-        range_start_str = current_start.strftime("%Y-%m-%dT00:00:00")
-        range_end_str = current_end.strftime("%Y-%m-%dT23:59:59")
-
-        print(f"== Отрезок {i + 1} из {parts}: {range_start_str}..{range_end_str} ==")
-        parse_by_date_range(access_token, range_start_str, range_end_str)
+        current_end = min(current_start + timedelta(days=days_per_part + extra - 1), dt_end)
+        slices.append((f"{current_start.isoformat()}T00:00:00", f"{current_end.isoformat()}T23:59:59"))
 
         current_start = current_end + timedelta(days=1)
         if current_start > dt_end:
             break
 
+    return slices
+
+
+def parse_with_parts(date_from, date_to, parts):
+    """
+    Разбивает [date_from; date_to] на 'parts' равных отрезков (по дням)
+    и загружает вакансии по каждому отрезку.
+    """
+    slices = split_date_range(date_from, date_to, parts)
+
+    # Отрезки загружаются параллельно через общий пул fetch_date_ranges,
+    # а пишем в БД только из основного потока
+    for i, ((start, end), vacancies) in enumerate(zip(slices, fetch_date_ranges(slices))):
+        save_to_db(vacancies)
+        print(f"== Отрезок {i + 1} из {len(slices)}: {start}..{end}, сохранено {len(vacancies)} вакансий ==")
+
 
 # ===============================
 # Новая функция:
 # Парсинг за последние 3 месяца с разбивкой на 30 частей
 # ===============================
-def parse_last_1_months(access_token, parts=30):
+def parse_last_1_months(parts=30):
     """
     Берём дату 'сейчас' и дату '3 месяца назад' (90 дней),
     затем парсим вакансии с разбиением на parts частей.
@@ -415,7 +580,7 @@ def parse_last_1_months(access_token, parts=30):
     date_from = three_months_ago.strftime("%Y-%m-%d")
     date_to = today.strftime("%Y-%m-%d")
 
-    parse_with_parts(access_token, date_from, date_to, parts)
+    parse_with_parts(date_from, date_to, parts)
 
 
 # ===============================
@@ -454,9 +619,6 @@ def export_to_google_sheets():
     """
     Выгружает данные из БД в указанный Google Sheet.
     """
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-
     # Базовый SQL-запрос
     query = """
         SELECT
@@ -467,66 +629,79 @@ def export_to_google_sheets():
     """
 
     # Исключаем определённых работодателей
-    if EXCLUDED_EMPLOYEE_IDS:
-        placeholders = ",".join(["?"] * len(EXCLUDED_EMPLOYEE_IDS))
+    if EXCLUDED_EMPLOYEE_ID_STRS:
+        placeholders = ",".join(["?"] * len(EXCLUDED_EMPLOYEE_ID_STRS))
         query += f" WHERE employer_id NOT IN ({placeholders})"
 
     query += " ORDER BY published_at DESC"
 
-    if EXCLUDED_EMPLOYEE_IDS:
-        cursor.execute(query, [str(eid) for eid in EXCLUDED_EMPLOYEE_IDS])
-    else:
-        cursor.execute(query)
-
-    rows = cursor.fetchall()
-    conn.close()
-
     # Заголовки
     headers = [
         "ID", "Вакансия", "Город", "Employer ID", "Компания",
         "Контактное лицо", "Телефон(ы)", "Почта",
         "Проф. Роли", "Отрасль", "Дата публ.", "URL"
     ]
-    data = [headers] + list(rows)
 
-    # Авторизация и отправка в Google Sheets
+    sheet_name = "Sheet"  # При необходимости поменяйте название листа
+    # Заголовки идут в A1, строки — диапазонами по SHEET_BATCH_ROWS прямо
+    # из курсора (fetchmany), так что каждая строка лежит в памяти один раз
+    value_ranges = [{"range": f"{sheet_name}!A1", "values": [headers]}]
+    total_rows = 0
+
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        if EXCLUDED_EMPLOYEE_ID_STRS:
+            cursor.execute(query, list(EXCLUDED_EMPLOYEE_ID_STRS))
+        else:
+            cursor.execute(query)
+
+        while True:
+            chunk = cursor.fetchmany(SHEET_BATCH_ROWS)
+            if not chunk:
+                break
+            value_ranges.append({"range": f"{sheet_name}!A{total_rows + 2}", "values": chunk})
+            total_rows += len(chunk)
+
+    # Авторизация и отправка в Google Sheets одним batchUpdate
     creds = get_google_creds_service_account("credentials_google.json")
     service = build("sheets", "v4", credentials=creds)
     sheet = service.spreadsheets()
 
-    range_name = "Sheet!A1"  # При необходимости поменяйте название листа
-    sheet.values().update(
+    sheet.values().batchUpdate(
         spreadsheetId=SHEET_ID,
-        range=range_name,
-        valueInputOption="RAW",
-        body={"values": data}
+        body={"valueInputOption": "RAW", "data": value_ranges}
     ).execute()
 
-    print(f"Обновлено строк: {len(rows)}")
+    print(f"Обновлено строк: {total_rows}")
 
 def get_refresh_token():
-    token_file = "hh_token.json"
-    # Если файл с токеном уже есть – читаем
-    if os.path.exists(token_file):
-        with open(token_file, "r") as f:
-            token_data = json.load(f)
+    token_data = load_hh_token_data()
+    if token_data is not None:
         return token_data.get("refresh_token")
     
 # ===============================
 # Главная функция
 # ===============================
 def main():
-    init_db()
+    global SESSION
+    SESSION = create_session()
     access_token = get_hh_token()
+    # Токен выставляется в сессию один раз и уходит со всеми запросами
+    SESSION.headers["Authorization"] = f"Bearer {access_token}"
 
+    # Одно соединение с БД на весь прогон, закрываем его один раз в конце
     try:
-        parse_last_1_months(access_token, parts=20)
-    except HttpRequestError as e:
-        print(e)
-        refresh_hh_token(get_refresh_token())
-        raise
-        
-    export_to_google_sheets()
+        init_db()
+        try:
+            parse_last_1_months(parts=20)
+        except HttpRequestError as e:
+            print(e)
+            refresh_hh_token(get_refresh_token())
+            raise
+
+        export_to_google_sheets()
+    finally:
+        close_db()
 
 
 if __name__ == "__main__":